@@ -1,36 +1,101 @@
 
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import csv
+import io
+import logging
 
-from sqlalchemy import text
-from database import engine, get_db
-from models import Base, AuditRule
-from audit_service import create_default_audit_rules
+from sqlalchemy import inspect, select
+from sqlalchemy.schema import CreateTable
+from database import migration_engine
+from models import AuditRule
 
-def migrate_audit_rules():
-    """Add audit_rules table and populate with default data"""
+log = logging.getLogger("migrate")
+
+# Raw seed statement for psycopg2 (pyformat placeholders)
+SEED_AUDIT_RULES_SQL = (
+    "INSERT INTO audit_rules (category, max_limit, is_restricted, description) "
+    "VALUES (%(category)s, %(max_limit)s, %(is_restricted)s, %(description)s)"
+)
+
+SEED_COLUMNS = ("category", "max_limit", "is_restricted", "description")
+
+# Seeds at least this large are bulk-loaded with COPY instead of INSERT
+COPY_THRESHOLD = 1000
+
+def _copy_audit_rules(conn, rows):
+    """Bulk load rows with COPY FROM STDIN on the connection's psycopg2 cursor"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in SEED_COLUMNS])
+    buffer.seek(0)
     
+    cursor = conn.connection.cursor()
     try:
-        # Create the audit_rules table
-        print("Creating audit_rules table...")
-        Base.metadata.create_all(bind=engine)
-        print("[SUCCESS] audit_rules table created successfully")
-        
-        # Initialize default audit rules
-        print("Initializing default audit rules...")
-        with next(get_db()) as db:
-            create_default_audit_rules(db)
-        print("[SUCCESS] Default audit rules initialized")
+        cursor.copy_expert(f"COPY audit_rules ({', '.join(SEED_COLUMNS)}) FROM STDIN WITH CSV", buffer)
+    finally:
+        cursor.close()
+
+def _seed_audit_rules(conn, rows):
+    """Insert rows into audit_rules using the cheapest path the driver offers"""
+    if conn.dialect.driver != "psycopg2":
+        conn.execute(AuditRule.__table__.insert(), rows)
+    elif len(rows) >= COPY_THRESHOLD:
+        # No per-statement parse/plan, rows streamed in one COPY
+        _copy_audit_rules(conn, rows)
+    else:
+        # Hand the static rows straight to the driver, skipping statement compilation;
+        # migration_engine routes this executemany through psycopg2's execute_batch
+        conn.exec_driver_sql(SEED_AUDIT_RULES_SQL, rows)
+
+def _migrate_audit_rules(conn):
+    """Create audit_rules and seed it on an open connection"""
+    
+    # Create only the audit_rules table; re-runs stop after a single catalog lookup
+    table = AuditRule.__table__
+    created = False
+    if inspect(conn).has_table(table.name):
+        log.debug("audit_rules table already exists")
+    else:
+        # Bare table first; its secondary indexes are built after the seed
+        log.debug("Creating audit_rules table")
+        conn.execute(CreateTable(table))
+        created = True
+    
+    # Initialize default audit rules (imported here so loading this module stays cheap)
+    from audit_service import DEFAULT_AUDIT_RULES
+    if conn.execute(select(table.c.id).limit(1)).first() is None:
+        _seed_audit_rules(conn, DEFAULT_AUDIT_RULES)
+        log.info("Inserted %d default audit rules", len(DEFAULT_AUDIT_RULES))
+    
+    if created:
+        # One sorted build per index instead of maintaining it on every seeded row
+        for index in table.indexes:
+            index.create(bind=conn)
+
+def migrate_audit_rules(conn=None):
+    """Add audit_rules table and populate with default data
+    
+    When conn is given the caller owns the transaction and errors propagate.
+    """
+    
+    if conn is not None:
+        _migrate_audit_rules(conn)
+        return True
+    
+    try:
+        # DDL and seed run in one transaction: commit on success, full rollback on failure
+        with migration_engine.begin() as conn:
+            _migrate_audit_rules(conn)
         
-        print("[COMPLETE] Migration completed successfully!")
+        log.info("audit_rules migration completed")
         
     except Exception as e:
-        print(f"[ERROR] Migration failed: {str(e)}")
+        log.error("audit_rules migration failed: %s", e)
         return False
     
     return True
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     migrate_audit_rules()
\ No newline at end of file
@@ -1,27 +1,50 @@
+import logging
 from sqlalchemy import text
-from database import engine
+from database import migration_engine
 
-def add_insights_column():
-    """Add insights column to documents table"""
+log = logging.getLogger("migrate")
+
+def add_columns(conn, table, columns):
+    """Add any missing columns to a table
+    
+    columns is a list of (name, sql_type) pairs. Outside SQLite they are all added
+    by one ALTER TABLE statement, so the table is locked and its catalog entry
+    rewritten once no matter how many columns are added.
+    """
+    if conn.dialect.name == "sqlite":
+        # SQLite has no ADD COLUMN IF NOT EXISTS and allows one column per ALTER
+        existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+        for name, sql_type in columns:
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}"))
+        return
+    
+    clauses = ", ".join(f"ADD COLUMN IF NOT EXISTS {name} {sql_type}" for name, sql_type in columns)
+    conn.execute(text(f"ALTER TABLE {table} {clauses}"))
+
+def _add_insights_column(conn):
+    """Add the insights column on an open connection"""
+    # JSONB on PostgreSQL: parsed once on write instead of on every read, and GIN-indexable
+    json_type = "JSONB" if conn.dialect.name == "postgresql" else "JSON"
+    add_columns(conn, "documents", [("insights", json_type)])
+    log.info("Ensured insights column on documents table")
+
+def add_insights_column(conn=None):
+    """Add insights column to documents table
+    
+    When conn is given the caller owns the transaction and errors propagate.
+    """
+    if conn is not None:
+        _add_insights_column(conn)
+        return
+    
     try:
-        with engine.connect() as conn:
-            # Check if column exists
-            result = conn.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name='documents' AND column_name='insights'
-            """))
-            
-            if not result.fetchone():
-                # Add the column
-                conn.execute(text("ALTER TABLE documents ADD COLUMN insights JSON"))
-                conn.commit()
-                print("Added insights column to documents table")
-            else:
-                print("Insights column already exists")
+        with migration_engine.begin() as conn:
+            _add_insights_column(conn)
                 
     except Exception as e:
-        print(f"Error adding insights column: {e}")
+        log.error("Error adding insights column: %s", e)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     add_insights_column()
\ No newline at end of file
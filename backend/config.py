@@ -11,6 +11,7 @@ class Settings:
     CLOUDINARY_API_SECRET: str = os.getenv("CLOUDINARY_API_SECRET")
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", 10485760))
+    GROQ_MAX_CONCURRENCY: int = int(os.getenv("GROQ_MAX_CONCURRENCY", 8))
     ALLOWED_EXTENSIONS: list = os.getenv("ALLOWED_EXTENSIONS", "pdf,png,jpg,jpeg").split(",")
 
 settings = Settings()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.pool import NullPool
@@ -18,9 +19,32 @@ engine = create_engine(
         "connect_timeout": 10,
         "application_name": "pdfreader_app"
     },
+    insertmanyvalues_page_size=1000,  # Rows per batched multi-values INSERT
     echo=False
 )
 
+# One-shot engine for the migration scripts: no pooling, large INSERT batches.
+# Driver-specific options are only passed where they apply, so other URLs (e.g. sqlite) still import
+_migration_url = make_url(DATABASE_URL)
+_migration_options = {}
+if _migration_url.get_backend_name() == "postgresql":
+    _migration_options["connect_args"] = {
+        "sslmode": "require",
+        "connect_timeout": 10,
+        "application_name": "pdfreader_migrations"
+    }
+if _migration_url.get_driver_name() == "psycopg2":
+    _migration_options["executemany_mode"] = "values_plus_batch"  # psycopg2: executemany via extras.execute_batch
+    _migration_options["executemany_batch_page_size"] = 1000  # Parameter sets per execute_batch round-trip (default 100)
+
+migration_engine = create_engine(
+    _migration_url,
+    poolclass=NullPool,
+    insertmanyvalues_page_size=10000,
+    echo=False,
+    **_migration_options
+)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -1,20 +1,28 @@
 from fastapi import FastAPI, UploadFile, File, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import io
+from contextlib import asynccontextmanager
 from typing import List
 
-from database import get_db, engine
+from database import get_db, engine, SessionLocal
 from models import Base, Document, AuditPolicy, AuditRule
-from schemas import DocumentResponse, UploadResponse, ErrorResponse, AuditPolicyResponse
+from schemas import DocumentResponse, DocumentSummary, UploadResponse, ErrorResponse, AuditPolicyResponse
 from utils import (
+    http_client,
+    new_file_hasher,
     generate_file_hash,
     detect_file_type,
     upload_to_cloudinary,
-    process_with_groq
+    prepare_groq_input,
+    groq_user_response,
+    groq_json_response,
+    get_cached_groq_outputs,
+    cache_groq_outputs
 )
-from audit_service import create_default_audit_policies, create_default_audit_rules, perform_audit
+from audit_service import create_default_audit_policies, create_default_audit_rules, perform_audit, looks_like_invoice
 from config import settings
 from migrate import migrate_database
 
@@ -24,12 +32,18 @@ Base.metadata.create_all(bind=engine)
 # Run migration
 migrate_database()
 
-# Initialize default audit policies and rules
-with next(get_db()) as db:
+# Initialize default audit policies and rules (plain session, not the request dependency)
+with SessionLocal() as db:
     create_default_audit_policies(db)
     create_default_audit_rules(db)
 
-app = FastAPI(title="Document Processing API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the pooled Cloudinary connections on shutdown
+    await http_client.aclose()
+
+app = FastAPI(title="Document Processing API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -40,7 +54,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-executor = ThreadPoolExecutor(max_workers=4)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+def duplicate_error(existing_doc: Document) -> HTTPException:
+    """400 response for a file whose hash is already stored"""
+    return HTTPException(
+        status_code=400, 
+        detail=f"Duplicate flagged and cant upload again|📄 {existing_doc.original_filename}|🕒 {existing_doc.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
+    )
+
+def not_invoice_error() -> HTTPException:
+    """400 response for a document the Groq summary doesn't read as an invoice"""
+    return HTTPException(
+        status_code=400, 
+        detail="Document rejected: Only invoice/bill documents are accepted for processing."
+    )
+
+async def settle_tasks(*tasks):
+    """Cancel whatever is still running and collect every outcome, so no task outlives or goes unobserved by the request"""
+    tasks = [task for task in tasks if task is not None]
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
 
 @app.post("/upload", response_model=UploadResponse)
 async def upload_document(
@@ -48,18 +84,32 @@ async def upload_document(
     db: Session = Depends(get_db)
 ):
     try:
-        # Validate file size
-        file_content = await file.read()
-        if len(file_content) > settings.MAX_FILE_SIZE:
-            raise HTTPException(status_code=413, detail="File too large")
-        
         # Validate file extension
         file_extension = file.filename.split('.')[-1].lower()
         if file_extension not in settings.ALLOWED_EXTENSIONS:
             raise HTTPException(status_code=400, detail="File type not allowed")
         
+        # Validate file size while reading, so oversized uploads stop at the limit.
+        # Each chunk is hashed as it arrives and written into a single buffer, so the file is held once
+        file_hasher = new_file_hasher()
+        buffer = io.BytesIO()
+        total_size = 0
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            total_size += len(chunk)
+            if total_size > settings.MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail="File too large")
+            file_hasher.update(chunk)
+            buffer.write(chunk)
+        
+        # getvalue() hands over the buffer's bytes without copying them
+        file_content = buffer.getvalue()
+        del buffer
+        
         # Generate hash and check for duplicates
-        file_hash = generate_file_hash(file_content)
+        file_hash = generate_file_hash(file_hasher)
         
         try:
             existing_doc = db.query(Document).filter(Document.file_hash == file_hash).first()
@@ -69,52 +119,57 @@ async def upload_document(
             existing_doc = None
         
         if existing_doc:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Duplicate flagged and cant upload again|📄 {existing_doc.original_filename}|🕒 {existing_doc.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
-            )
-        
-        # Detect file type
-        file_type, is_processable = detect_file_type(file_content, file.filename)
-        
-        if not is_processable:
-            raise HTTPException(status_code=400, detail="File cannot be processed")
+            raise duplicate_error(existing_doc)
         
-        # Process in parallel: upload to cloudinary and process with groq
-        loop = asyncio.get_event_loop()
-        
-        groq_task = loop.run_in_executor(
-            executor,
-            process_with_groq,
-            file_content,
-            file_type,
-            file.filename
-        )
-        
-        # Get Groq response first to check if it's an invoice
-        groq_response, json_data = await groq_task
-        
-        # Check if document is an invoice
-        content = groq_response.lower()
-        invoice_keywords = ['invoice', 'bill', 'receipt', 'total', 'amount', 'price', 'cost', 'payment']
-        has_invoice_format = any(keyword in content for keyword in invoice_keywords)
-        
-        if not has_invoice_format:
-            raise HTTPException(
-                status_code=400, 
-                detail="Document rejected: Only invoice/bill documents are accepted for processing."
+        cached = get_cached_groq_outputs(file_hash)
+        if cached is not None:
+            # Same content was sent before (and rejected or failed), so reuse its Groq outputs
+            file_type, groq_response, json_data = cached
+            if not looks_like_invoice(groq_response):
+                raise not_invoice_error()
+            cloudinary_url = await upload_to_cloudinary(file_content, file_hash, file.filename, file_type)
+        else:
+            # PDF parsing and base64-encoding are CPU work; run them in the default thread pool
+            # so other uploads keep being served meanwhile
+            loop = asyncio.get_running_loop()
+            
+            # Detect file type
+            file_type, is_processable, extracted_text = await loop.run_in_executor(
+                None, detect_file_type, file_content, file.filename
             )
-        
-        # Only upload to Cloudinary if it's an invoice
-        upload_task = loop.run_in_executor(
-            executor,
-            upload_to_cloudinary,
-            file_content,
-            file.filename,
-            file_type
-        )
-        
-        cloudinary_url = await upload_task
+            
+            if not is_processable:
+                raise HTTPException(status_code=400, detail="File cannot be processed")
+            
+            groq_input = await loop.run_in_executor(
+                None, prepare_groq_input, file_content, file_type, extracted_text
+            )
+            
+            # The JSON extraction doesn't depend on the invoice check, so start it right away
+            json_task = asyncio.ensure_future(groq_json_response(groq_input, file_type))
+            upload_task = None
+            groq_response = None
+            try:
+                # Get Groq response first to check if it's an invoice
+                groq_response = await groq_user_response(groq_input, file_type)
+                
+                # Check if document is an invoice
+                if not looks_like_invoice(groq_response):
+                    cache_groq_outputs(file_hash, file_type, groq_response, None)
+                    raise not_invoice_error()
+                
+                # Only upload to Cloudinary if it's an invoice, overlapping the JSON extraction
+                upload_task = asyncio.ensure_future(
+                    upload_to_cloudinary(file_content, file_hash, file.filename, file_type)
+                )
+                json_data, cloudinary_url = await asyncio.gather(json_task, upload_task)
+            finally:
+                # Don't leave the JSON request or the upload running for a rejected or failed upload
+                await settle_tasks(json_task, upload_task)
+                # Keep both Groq outputs once they exist, even if the Cloudinary upload failed,
+                # so a retry of the same file skips Groq
+                if groq_response is not None and not json_task.cancelled() and json_task.exception() is None:
+                    cache_groq_outputs(file_hash, file_type, groq_response, json_task.result())
         
         # Perform audit check
         audit_result = perform_audit(groq_response, json_data, db)
@@ -126,30 +181,33 @@ async def upload_document(
                 detail=f"Document rejected: Restricted items found. Document cannot be approved."
             )
         
-        # Only save to database if all validations pass
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                new_document = Document(
-                    file_hash=file_hash,
-                    file_type=file_type,
-                    original_filename=file.filename,
-                    cloudinary_url=cloudinary_url,
-                    groq_response=groq_response,
-                    audit_result=audit_result.dict() if audit_result else None
-                )
-                
-                db.add(new_document)
-                db.commit()
-                db.refresh(new_document)
-                break
-            except Exception as db_error:
-                db.rollback()
-                if attempt == max_retries - 1:
-                    raise db_error
-                await asyncio.sleep(1)
+        # Only save to database if all validations pass; one round trip inserts and returns the row
+        insert_stmt = (
+            insert(Document)
+            .values(
+                file_hash=file_hash,
+                file_type=file_type,
+                original_filename=file.filename,
+                cloudinary_url=cloudinary_url,
+                groq_response=groq_response,
+                audit_result=audit_result.model_dump() if audit_result else None
+            )
+            .on_conflict_do_nothing(index_elements=[Document.file_hash])
+            .returning(*Document.__table__.columns)
+        )
+        try:
+            new_document = db.execute(insert_stmt).mappings().first()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        if new_document is None:
+            # A concurrent upload of the same file committed first (unique file_hash)
+            existing_doc = db.query(Document).filter(Document.file_hash == file_hash).first()
+            raise duplicate_error(existing_doc)
         
-        response_data = DocumentResponse(**new_document.__dict__)
+        response_data = DocumentResponse.model_validate(new_document)
         if audit_result:
             response_data.audit_result = audit_result
         
@@ -165,10 +223,17 @@ async def upload_document(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.get("/documents", response_model=List[DocumentResponse])
+@app.get("/documents", response_model=List[DocumentSummary])
 async def get_all_documents(db: Session = Depends(get_db)):
-    documents = db.query(Document).order_by(Document.created_at.desc()).all()
-    return [DocumentResponse(**doc.__dict__) for doc in documents]
+    # List view only: skip the large groq_response/audit_result columns
+    documents = db.query(
+        Document.id,
+        Document.file_type,
+        Document.original_filename,
+        Document.cloudinary_url,
+        Document.created_at
+    ).order_by(Document.created_at.desc()).all()
+    return [doc._asdict() for doc in documents]
 
 @app.put("/document/{document_id}/rename")
 async def rename_document(document_id: int, new_name: str, db: Session = Depends(get_db)):
@@ -187,17 +252,17 @@ async def get_document(document_id: int, db: Session = Depends(get_db)):
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
-    return DocumentResponse(**document.__dict__)
+    return DocumentResponse.model_validate(document)
 
 @app.get("/audit-policies", response_model=List[AuditPolicyResponse])
 async def get_audit_policies(db: Session = Depends(get_db)):
     policies = db.query(AuditPolicy).all()
-    return [AuditPolicyResponse(**policy.__dict__) for policy in policies]
+    return [AuditPolicyResponse.model_validate(policy) for policy in policies]
 
 @app.get("/audit-rules")
 async def get_audit_rules(db: Session = Depends(get_db)):
-    rules = db.query(AuditRule).all()
-    return [{"id": rule.id, "category": rule.category, "max_limit": rule.max_limit, "is_restricted": rule.is_restricted, "description": rule.description} for rule in rules]
+    rules = db.query(AuditRule.id, AuditRule.category, AuditRule.max_limit, AuditRule.is_restricted, AuditRule.description).all()
+    return [rule._asdict() for rule in rules]
 
 @app.get("/health")
 async def health_check():
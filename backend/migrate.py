@@ -1,44 +1,62 @@
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from database import engine
 
+# Column probe, parameterized so one statement serves every table list
+_COLUMNS_QUERY = text("""
+    SELECT table_name, column_name 
+    FROM information_schema.columns 
+    WHERE table_schema = current_schema() 
+    AND table_name IN :tables
+""").bindparams(bindparam("tables", expanding=True))
+
+# table_name -> set of column names, filled by one catalog query per batch of tables
+_existing_columns_cache = {}
+
+def get_existing_columns(conn, tables):
+    """Return cached (table, column) pairs for the given tables"""
+    missing = [table for table in tables if table not in _existing_columns_cache]
+    
+    if missing:
+        for table in missing:
+            _existing_columns_cache[table] = set()
+        for table_name, column_name in conn.execute(_COLUMNS_QUERY, {"tables": missing}):
+            _existing_columns_cache[table_name].add(column_name)
+    
+    return {(table, column) for table in tables for column in _existing_columns_cache[table]}
+
 def migrate_database():
     """Add missing columns to tables if they don't exist"""
     
-    with engine.connect() as conn:
-        # Check if severity column exists in audit_policies
-        result = conn.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'audit_policies' 
-            AND column_name = 'severity'
-        """))
+    # One transaction for every step, committed when the block exits
+    with engine.begin() as conn:
+        existing_columns = get_existing_columns(conn, ["audit_policies", "documents"])
         
-        if not result.fetchone():
+        # Check if severity column exists in audit_policies
+        if ("audit_policies", "severity") not in existing_columns:
             # Add severity column
             conn.execute(text("""
                 ALTER TABLE audit_policies 
                 ADD COLUMN severity VARCHAR(20) DEFAULT 'medium'
             """))
-            conn.commit()
+            _existing_columns_cache["audit_policies"].add("severity")
             print("Added severity column to audit_policies table")
         
         # Check if audit_result column exists in documents
-        result = conn.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'documents' 
-            AND column_name = 'audit_result'
-        """))
-        
-        if not result.fetchone():
+        if ("documents", "audit_result") not in existing_columns:
             # Add audit_result column
             conn.execute(text("""
                 ALTER TABLE documents 
                 ADD COLUMN audit_result JSON
             """))
-            conn.commit()
+            _existing_columns_cache["documents"].add("audit_result")
             print("Added audit_result column to documents table")
         
+        # Partial index for the active-policy query; create_all only adds it to new tables
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_audit_policies_active 
+            ON audit_policies (id) WHERE is_active
+        """))
+        
         print("Database migration completed")
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer, Float, Boolean, JSON
+from sqlalchemy import Column, String, DateTime, Text, Integer, Float, Boolean, JSON, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -30,6 +30,11 @@ class AuditPolicy(Base):
     severity = Column(String(20), default='medium')  # 'low', 'medium', 'high', 'warning'
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Partial index over active policies, the only rows the audit loads
+    __table_args__ = (
+        Index("ix_audit_policies_active", "id", postgresql_where=text("is_active")),
+    )
 
 class AuditRule(Base):
     __tablename__ = "audit_rules"
@@ -0,0 +1,26 @@
+import logging
+from database import migration_engine
+from add_audit_rules_migration import migrate_audit_rules
+from add_insights_migration import add_insights_column
+
+log = logging.getLogger("migrate")
+
+def run_migrations():
+    """Run every migration script on one connection inside a single transaction"""
+    
+    try:
+        with migration_engine.begin() as conn:
+            migrate_audit_rules(conn)
+            add_insights_column(conn)
+        
+        log.info("All migrations completed")
+        
+    except Exception as e:
+        log.error("Migrations failed, no changes were applied: %s", e)
+        return False
+    
+    return True
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    run_migrations()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import Optional, Dict, List, Any
 
@@ -22,8 +22,15 @@ class DocumentResponse(BaseModel):
     created_at: datetime
     is_duplicate: bool = False
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class DocumentSummary(BaseModel):
+    """List-view fields only; the full document comes from /document/{id}"""
+    id: int
+    file_type: str
+    original_filename: str
+    cloudinary_url: str
+    created_at: datetime
 
 class UploadResponse(BaseModel):
     success: bool
@@ -45,5 +52,4 @@ class AuditPolicyResponse(BaseModel):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
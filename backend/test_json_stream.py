@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# utils builds its Groq client at import; nothing here reaches the network
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import asyncio
+from types import SimpleNamespace
+
+import utils
+
+class FakeStream:
+    """Stands in for Groq's AsyncStream, yielding the text in fixed-size deltas"""
+
+    def __init__(self, text, chunk_size):
+        self.pieces = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        self.read = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for piece in self.pieces:
+            self.read += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+        # Groq ends with a usage-only chunk that carries no choices
+        yield SimpleNamespace(choices=[])
+
+async def stream_json(text, chunk_size):
+    streams = []
+
+    async def create(**kwargs):
+        streams.append(FakeStream(text, chunk_size))
+        return streams[-1]
+
+    utils.groq_client.chat.completions.create = create
+    return await utils._groq_json_completion(model="test", messages=[]), streams[0]
+
+def test_json_stream_cutoff():
+    """Test where the streamed JSON extraction stops, across chunk boundaries"""
+
+    test_cases = [
+        {
+            "name": "Trailing Prose",
+            "text": '{"items": [{"name": "Pen", "amount": 10}], "total_amount": 10}\nThese are the items on the invoice.',
+            "expected": '{"items": [{"name": "Pen", "amount": 10}], "total_amount": 10}'
+        },
+        {
+            "name": "Braces Inside Strings",
+            "text": '{"items": [{"name": "Combo {large} }{", "amount": 5}]} extra',
+            "expected": '{"items": [{"name": "Combo {large} }{", "amount": 5}]}'
+        },
+        {
+            "name": "Escaped Quotes",
+            "text": '{"name": "12\\" pizza \\"}\\"", "amount": 3} done',
+            "expected": '{"name": "12\\" pizza \\"}\\"", "amount": 3}'
+        },
+        {
+            "name": "Escaped Backslash Before Quote",
+            "text": '{"path": "C:\\\\", "amount": 1} done',
+            "expected": '{"path": "C:\\\\", "amount": 1}'
+        },
+        {
+            "name": "Leading Whitespace",
+            "text": '\n  {"total_amount": 0}\nNo items found.',
+            "expected": '\n  {"total_amount": 0}'
+        },
+        {
+            "name": "Fenced Output Passes Through",
+            "text": '```json\n{"items": [], "total_amount": 0}\n```',
+            "expected": '```json\n{"items": [], "total_amount": 0}\n```'
+        },
+        {
+            "name": "Prose Passes Through",
+            "text": 'Sorry, I could not find any items {or totals}.',
+            "expected": 'Sorry, I could not find any items {or totals}.'
+        },
+        {
+            "name": "Unterminated Object Read In Full",
+            "text": '{"items": [{"name": "Pen"',
+            "expected": '{"items": [{"name": "Pen"'
+        }
+    ]
+
+    async def run_cases():
+        failures = 0
+        for test_case in test_cases:
+            print(f"\n=== Testing: {test_case['name']} ===")
+            for chunk_size in (1, 2, 3, 7, len(test_case['text'])):
+                result, stream = await stream_json(test_case['text'], chunk_size)
+                passed = result == test_case['expected']
+                print(f"chunk size {chunk_size}: read {stream.read}/{len(stream.pieces)} chunks - {'PASS' if passed else 'FAIL'}")
+                if not passed:
+                    print(f"  Expected: {test_case['expected']!r}")
+                    print(f"  Actual: {result!r}")
+                    failures += 1
+        return failures
+
+    failures = asyncio.run(run_cases())
+    assert failures == 0, f"{failures} streamed JSON cases failed"
+
+if __name__ == "__main__":
+    test_json_stream_cutoff()
@@ -1,36 +1,136 @@
+import asyncio
 import hashlib
+import time
+import httpx
 import pymupdf
-import cloudinary
-import cloudinary.uploader
-from groq import Groq
+from groq import AsyncGroq
 from config import settings
 from typing import Tuple, Optional
 import json
 import base64
 import io
+from collections import OrderedDict
 
 # Initialize services
-cloudinary.config(
-    cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-    api_key=settings.CLOUDINARY_API_KEY,
-    api_secret=settings.CLOUDINARY_API_SECRET
-)
+CLOUDINARY_UPLOAD_URL = "https://api.cloudinary.com/v1_1/{cloud_name}/{resource_type}/upload"
 
-groq_client = Groq(api_key=settings.GROQ_API_KEY)
+# Shared client so uploads reuse pooled connections to Cloudinary
+http_client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
 
-def generate_file_hash(file_content: bytes) -> str:
-    """Generate SHA-256 hash of file content"""
-    return hashlib.sha256(file_content + settings.SECRET_KEY.encode()).hexdigest()
+groq_client = AsyncGroq(api_key=settings.GROQ_API_KEY)
 
-def detect_file_type(file_content: bytes, filename: str) -> Tuple[str, bool]:
+# Salt appended to every file hash, encoded once at import
+_SECRET_BYTES = settings.SECRET_KEY.encode()
+
+# Caps in-flight Groq requests across uploads; created lazily inside the running loop
+_groq_semaphore = None
+
+# Groq outputs per file hash, so re-sending a rejected file doesn't hit Groq again
+GROQ_CACHE_SIZE = 256
+_groq_cache = OrderedDict()
+
+def get_cached_groq_outputs(file_hash: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """Return (file_type, groq_response, json_data) from an earlier upload of this file, if any"""
+    cached = _groq_cache.get(file_hash)
+    if cached is not None:
+        _groq_cache.move_to_end(file_hash)
+    return cached
+
+def cache_groq_outputs(file_hash: str, file_type: str, groq_response: str, json_data: Optional[str]):
+    """Remember Groq outputs for a file hash, evicting the least recently used entry when full"""
+    _groq_cache[file_hash] = (file_type, groq_response, json_data)
+    _groq_cache.move_to_end(file_hash)
+    if len(_groq_cache) > GROQ_CACHE_SIZE:
+        _groq_cache.popitem(last=False)
+
+def _groq_slots() -> asyncio.Semaphore:
+    """Shared Groq concurrency limit, created on first use inside the running loop"""
+    global _groq_semaphore
+    if _groq_semaphore is None:
+        _groq_semaphore = asyncio.Semaphore(settings.GROQ_MAX_CONCURRENCY)
+    return _groq_semaphore
+
+async def _groq_completion(**kwargs):
+    """Create one chat completion, waiting for a free Groq slot first"""
+    async with _groq_slots():
+        return await groq_client.chat.completions.create(**kwargs)
+
+def _json_object_end(text: str, state: list) -> int:
+    """
+    Index just past the close of the top-level JSON object in text, or -1 while it is still open.
+    state is [depth, in_string, escaped], carried across streamed chunks
+    """
+    depth, in_string, escaped = state
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    state[:] = [depth, in_string, escaped]
+    return -1
+
+async def _groq_json_completion(**kwargs) -> str:
+    """
+    Stream a completion and stop as soon as the JSON object it opens with is closed,
+    instead of waiting for the model to finish. Output that doesn't start with '{' is read in full
+    """
+    parts = []
+    is_object = None
+    state = [0, False, False]
+    async with _groq_slots():
+        stream = await groq_client.chat.completions.create(stream=True, **kwargs)
+        async with stream:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                text = chunk.choices[0].delta.content
+                if is_object is None and text.strip():
+                    is_object = text.lstrip().startswith('{')
+                if is_object:
+                    end = _json_object_end(text, state)
+                    if end != -1:
+                        # Leaving the stream closes the connection, so Groq stops generating
+                        parts.append(text[:end])
+                        break
+                parts.append(text)
+    return "".join(parts)
+
+def new_file_hasher():
+    """Start a SHA-256 to be fed the upload chunk by chunk as it is read"""
+    return hashlib.sha256()
+
+def generate_file_hash(file_hasher) -> str:
+    """Finish a hasher from new_file_hasher, salting it with the secret, and return the hex digest"""
+    file_hasher.update(_SECRET_BYTES)
+    return file_hasher.hexdigest()
+
+PDF_HEADER_WINDOW = 1024
+
+def detect_file_type(file_content: bytes, filename: str) -> Tuple[str, bool, Optional[str]]:
     """
     Detect if file is image or text-based document
-    Returns: (file_type, is_processable)
+    Returns: (file_type, is_processable, extracted_text) - the text is kept for text PDFs
+    so the Groq input doesn't need a second parse
     """
     # Check if it's an image first by file extension
     image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff']
     if any(filename.lower().endswith(ext) for ext in image_extensions):
-        return "image", True
+        return "image", True, None
+    
+    # Readers accept a %PDF header anywhere in the first 1 KB; anything else isn't worth a pymupdf parse
+    if b"%PDF" not in file_content[:PDF_HEADER_WINDOW]:
+        return "text", False, None
     
     # Try to open as PDF
     try:
@@ -39,50 +139,95 @@ def detect_file_type(file_content: bytes, filename: str) -> Tuple[str, bool]:
         # Check if PDF contains images or text
         has_text = False
         has_images = False
+        pages_text = []
         
         for page in doc:
-            if page.get_text().strip():
+            page_text = page.get_text()
+            pages_text.append(page_text)
+            if not has_text and page_text.strip():
                 has_text = True
-            if page.get_images():
+            # Every page's text is needed, but images only need to be found once
+            if not has_images and page.get_images():
                 has_images = True
         
         doc.close()
         
         # If PDF has text, treat as text document
         if has_text:
-            return "text", True
+            return "text", True, "".join(pages_text)
         # If PDF has only images, treat as image
         elif has_images:
-            return "image", True
+            return "image", True, None
         else:
-            return "text", False
+            return "text", False, None
             
     except:
         # Not a PDF, treat as text document
-        return "text", False
+        return "text", False, None
 
-def upload_to_cloudinary(file_content: bytes, filename: str, file_type: str) -> str:
-    """Upload file to Cloudinary and return URL"""
+def _cloudinary_signature(params: dict) -> str:
+    """Sign upload params the way Cloudinary's SDK does (sorted, '&' escaped, SHA-1 with the secret)"""
+    to_sign = "&".join(sorted(f"{key}={value}".replace("&", "%26") for key, value in params.items()))
+    return hashlib.sha1((to_sign + settings.CLOUDINARY_API_SECRET).encode()).hexdigest()
+
+async def upload_to_cloudinary(file_content: bytes, file_hash: str, filename: str, file_type: str) -> str:
+    """Upload file to Cloudinary under its content hash and return URL"""
     resource_type = "image" if file_type == "image" else "raw"
     
-    result = cloudinary.uploader.upload(
-        file_content,
-        resource_type=resource_type,
-        public_id=f"documents/{filename}",
-        overwrite=True
-    )
+    # Same content maps to the same asset; Cloudinary hands back the stored one instead of replacing it.
+    # Raw assets keep the extension in their public_id so the delivered URL still ends in .pdf
+    public_id = f"documents/{file_hash}"
+    if resource_type == "raw":
+        public_id += "." + filename.rsplit(".", 1)[-1].lower()
+    
+    params = {
+        "public_id": public_id,
+        "overwrite": "0",
+        "timestamp": str(int(time.time()))
+    }
+    params["signature"] = _cloudinary_signature(params)
+    params["api_key"] = settings.CLOUDINARY_API_KEY
+    
+    url = CLOUDINARY_UPLOAD_URL.format(cloud_name=settings.CLOUDINARY_CLOUD_NAME, resource_type=resource_type)
+    response = await http_client.post(url, data=params, files={"file": (filename, file_content)})
+    
+    if not response.is_success:
+        # Cloudinary explains API errors in a JSON body; gateways send HTML, so fall back to the raw text
+        try:
+            message = response.json()["error"]["message"]
+        except (ValueError, KeyError, TypeError):
+            message = response.text[:200]
+        raise RuntimeError(f"Cloudinary upload failed ({response.status_code}): {message}")
+    
+    try:
+        return response.json()["secure_url"]
+    except (ValueError, KeyError, TypeError):
+        raise RuntimeError(f"Cloudinary upload failed ({response.status_code}): unexpected response {response.text[:200]}")
+
+def prepare_groq_input(file_content: bytes, file_type: str, extracted_text: Optional[str] = None) -> str:
+    """Return what the Groq prompts embed: a base64 data URL for images, extracted text otherwise"""
+    if file_type == "image":
+        return "data:image/jpeg;base64," + base64.b64encode(file_content).decode('ascii')
+    if extracted_text is not None:
+        return extracted_text
     
-    return result["secure_url"]
+    try:
+        doc = pymupdf.open(stream=file_content, filetype="pdf")
+        text_content = ""
+        for page in doc:
+            text_content += page.get_text()
+        doc.close()
+    except:
+        text_content = file_content.decode('utf-8', errors='ignore')
+    return text_content
 
-def process_with_groq(file_content: bytes, file_type: str, filename: str) -> Tuple[str, str]:
-    """Process file with appropriate Groq model - returns (user_response, json_data)"""
+async def groq_user_response(groq_input: str, file_type: str) -> str:
+    """Get the user-facing extraction or summary for a prepared document"""
     
     if file_type == "image":
         # Use vision model for images
-        base64_image = base64.b64encode(file_content).decode('utf-8')
-        
-        # Get user-friendly response
-        user_response = groq_client.chat.completions.create(
+        image_url = groq_input
+        response = await _groq_completion(
             model="meta-llama/llama-4-scout-17b-16e-instruct",
             messages=[
                 {
@@ -95,7 +240,7 @@ def process_with_groq(file_content: bytes, file_type: str, filename: str) -> Tup
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
+                                "url": image_url
                             }
                         }
                     ]
@@ -103,9 +248,28 @@ def process_with_groq(file_content: bytes, file_type: str, filename: str) -> Tup
             ],
             max_tokens=1000
         )
-        
-        # Get JSON data for backend audit
-        json_response = groq_client.chat.completions.create(
+    else:
+        # Use text model for documents
+        text_content = groq_input
+        response = await _groq_completion(
+            model="llama-3.3-70b-versatile",
+            messages=[
+                {
+                    "role": "user",
+                    "content": f"Analyze and summarize this document content:\n\n{text_content[:4000]}"
+                }
+            ],
+            max_tokens=1000
+        )
+    
+    return response.choices[0].message.content
+
+async def groq_json_response(groq_input: str, file_type: str) -> str:
+    """Get the JSON item breakdown used by the backend audit"""
+    
+    if file_type == "image":
+        image_url = groq_input
+        json_data = await _groq_json_completion(
             model="meta-llama/llama-4-scout-17b-16e-instruct",
             messages=[
                 {
@@ -118,7 +282,7 @@ def process_with_groq(file_content: bytes, file_type: str, filename: str) -> Tup
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
+                                "url": image_url
                             }
                         }
                     ]
@@ -126,33 +290,9 @@ def process_with_groq(file_content: bytes, file_type: str, filename: str) -> Tup
             ],
             max_tokens=500
         )
-        
-        return user_response.choices[0].message.content, json_response.choices[0].message.content
-        
     else:
-        # Use text model for documents
-        try:
-            doc = pymupdf.open(stream=file_content, filetype="pdf")
-            text_content = ""
-            for page in doc:
-                text_content += page.get_text()
-            doc.close()
-        except:
-            text_content = file_content.decode('utf-8', errors='ignore')
-        
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"Analyze and summarize this document content:\n\n{text_content[:4000]}"
-                }
-            ],
-            max_tokens=1000
-        )
-        
-        # Get JSON data for audit
-        json_response = groq_client.chat.completions.create(
+        text_content = groq_input
+        json_data = await _groq_json_completion(
             model="llama-3.3-70b-versatile",
             messages=[
                 {
@@ -162,5 +302,5 @@ def process_with_groq(file_content: bytes, file_type: str, filename: str) -> Tup
             ],
             max_tokens=500
         )
-        
-        return response.choices[0].message.content, json_response.choices[0].message.content
\ No newline at end of file
+    
+    return json_data
\ No newline at end of file
@@ -183,7 +183,17 @@ function App() {
     }
   };
 
-  const handleDocumentClick = (doc) => {
+  const handleDocumentClick = async (doc) => {
+    // The document list only carries summary fields; load the full record for the view
+    if (doc.groq_response === undefined) {
+      try {
+        const response = await axios.get(`${API_BASE_URL}/document/${doc.id}`);
+        doc = response.data;
+      } catch (error) {
+        addMessage('Error loading document', 'bot');
+        return;
+      }
+    }
     setSelectedDocument(doc);
     setMessages([
       {